@@ -1,8 +1,18 @@
-from agilow_audio_recorder import record_audio
+import sys
+import time
+from agilow_audio_recorder import record_audio, LISTEN_TIMEOUT
 from agilow_transcription import transcribe_audio
-from agilow_task_extractor import extract_tasks
+from agilow_task_extractor import extract_tasks, ExtractionQueue
 from agilow_notion_handler import add_to_notion, handle_task_operations
 
+def apply_operations(task_dicts):
+    """Process each extracted task operation"""
+    for task_dict in task_dicts:
+        if handle_task_operations(task_dict):
+            print("✅ Operation completed successfully")
+        else:
+            print("❌ Operation failed")
+
 def main():
     # 1) Record audio
     audio_buffer = record_audio()
@@ -10,17 +20,59 @@ def main():
     # 2) Transcribe audio
     if audio_buffer:
         transcript = transcribe_audio(audio_buffer)
+        audio_buffer.close()  # release the recording (and its temp file, if any)
         
         # 3) Extract tasks with status and deadlines
         if transcript:
             task_dicts = extract_tasks(transcript)
             
             # 4) Process each task operation
-            for task_dict in task_dicts:
-                if handle_task_operations(task_dict):
-                    print("✅ Operation completed successfully")
+            apply_operations(task_dicts)
+
+# Daemon back-off when the microphone keeps failing
+RECORD_RETRY_DELAY = 1.0
+MAX_RECORD_FAILURES = 10
+
+def on_extracted(future):
+    """Apply a queued transcript's operations once its batch comes back"""
+    if future.exception():
+        print(f"❌ Extraction failed: {future.exception()}")
+        return
+    apply_operations(future.result())
+
+def run_daemon():
+    """Keep listening; transcripts that pile up while GPT is busy are extracted together"""
+    extraction_queue = ExtractionQueue()
+    failures = 0
+    try:
+        while True:
+            started = time.monotonic()
+            audio_buffer = record_audio()
+            if not audio_buffer:
+                # Returning well before the no-speech timeout means the device failed
+                if time.monotonic() - started < LISTEN_TIMEOUT:
+                    failures += 1
+                    if failures >= MAX_RECORD_FAILURES:
+                        print(f"❌ Recording failed {failures} times in a row, stopping.")
+                        break
+                    time.sleep(RECORD_RETRY_DELAY)
                 else:
-                    print("❌ Operation failed")
+                    failures = 0
+                continue
+
+            failures = 0
+
+            transcript = transcribe_audio(audio_buffer)
+            audio_buffer.close()
+            if transcript:
+                extraction_queue.submit(transcript).add_done_callback(on_extracted)
+    except KeyboardInterrupt:
+        print("\n⏹️ Stopping, finishing queued transcripts...")
+    finally:
+        extraction_queue.close()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    if "--daemon" in sys.argv:
+        run_daemon()
+    else:
+        main()
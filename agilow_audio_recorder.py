@@ -1,13 +1,239 @@
 import speech_recognition as sr
 import io
-import wave
+import math
+import mmap
+import struct
+import tempfile
+import collections
+import numpy as np
+
+# Capture settings
+LISTEN_TIMEOUT = 15          # seconds to start speaking
+PHRASE_TIME_LIMIT = 600      # seconds of speech allowed
+MEMORY_BUFFER_BYTES = 8 * 1024 * 1024  # ~90s of 44.1kHz mono before spilling to disk
+WAV_HEADER_SIZE = 44
+
+SAMPLE_DTYPES = {1: np.int8, 2: np.int16, 4: np.int32}
+
+def wav_header(data_size, sample_rate, sample_width, channels=1):
+    """Build a PCM WAV header for data_size bytes of audio"""
+    byte_rate = sample_rate * sample_width * channels
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate, byte_rate,
+        sample_width * channels, sample_width * 8,
+        b"data", data_size
+    )
+
+def frame_energy(frames, sample_width):
+    """RMS energy of a chunk of PCM frames"""
+    samples = np.frombuffer(frames, dtype=SAMPLE_DTYPES[sample_width])
+    if not samples.size:
+        return 0
+    return math.sqrt(np.mean(samples.astype(np.float64) ** 2))
+
+class AudioSpool:
+    """
+    Preallocated WAV buffer for a single recording.
+    Frames are written in place; once the in-memory buffer is full the
+    recording spills to a memory-mapped temp file sized for the longest
+    allowed phrase, so peak memory stays flat regardless of length.
+    """
+
+    def __init__(self, sample_rate, sample_width, capacity, memory_limit=MEMORY_BUFFER_BYTES):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.capacity = WAV_HEADER_SIZE + capacity
+        self._file = None
+        self._storage = bytearray(min(self.capacity, WAV_HEADER_SIZE + memory_limit))
+        self._view = memoryview(self._storage)
+        self._length = WAV_HEADER_SIZE
+
+    @property
+    def spilled(self):
+        return self._file is not None
+
+    def write(self, frames):
+        """Append frames, spilling to disk when the memory buffer is full. Returns False once full."""
+        size = len(frames)
+        if self._length + size > len(self._view):
+            if self.spilled or len(self._view) >= self.capacity:
+                return False
+            self._spill()
+        self._view[self._length:self._length + size] = frames
+        self._length += size
+        return True
+
+    @property
+    def length(self):
+        """Bytes of audio written so far, excluding the WAV header"""
+        return self._length - WAV_HEADER_SIZE
+
+    def truncate(self, length=0):
+        """Drop audio past length bytes (e.g. trailing silence, or a discarded false start)"""
+        self._length = min(self._length, WAV_HEADER_SIZE + length)
+
+    def _spill(self):
+        """Move the recording so far into a memory-mapped temp file"""
+        self._file = tempfile.TemporaryFile(prefix="agilow-", suffix=".wav")
+        self._file.truncate(self.capacity)
+        mapped = mmap.mmap(self._file.fileno(), self.capacity)
+        mapped[:self._length] = self._view[:self._length]
+        self._view.release()
+        self._storage = mapped
+        self._view = memoryview(mapped)
+        print(f"💾 Long recording, spilling audio to disk ({self._length // 1024} KB so far)")
+
+    def finish(self, name="audio.wav"):
+        """Write the WAV header and return a readable, zero-copy view of the recording"""
+        data_size = self._length - WAV_HEADER_SIZE
+        self._view[:WAV_HEADER_SIZE] = wav_header(data_size, self.sample_rate, self.sample_width)
+        return AudioSpoolReader(self._view[:self._length], name, owner=self)
+
+    def close(self):
+        self._view.release()
+        if self.spilled:
+            self._storage.close()
+            self._file.close()
+        self._storage = None
+
+class AudioSpoolReader(io.RawIOBase):
+    """Seekable file-like view over a finished AudioSpool, accepted by the OpenAI client"""
+
+    def __init__(self, view, name, owner=None):
+        super().__init__()
+        self._view = view
+        self._owner = owner
+        self._pos = 0
+        self.name = name
+
+    def getbuffer(self):
+        """Zero-copy access to the WAV bytes"""
+        return self._view
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        target = memoryview(buffer).cast("B")
+        size = min(len(target), len(self._view) - self._pos)
+        target[:size] = self._view[self._pos:self._pos + size]
+        self._pos += size
+        return size
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, offset)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        if not self.closed:
+            self._view.release()
+            if self._owner:
+                self._owner.close()
+        super().close()
+
+def capture_phrase(recognizer, source, timeout, phrase_time_limit):
+    """
+    Read microphone frames straight into an AudioSpool.
+    Mirrors Recognizer.listen: a small ring buffer holds pre-speech audio, the
+    phrase is recorded until pause_threshold seconds of silence, and phrases
+    shorter than phrase_threshold (clicks, bumps) are discarded.
+    """
+    seconds_per_buffer = float(source.CHUNK) / source.SAMPLE_RATE
+    pause_buffer_count = int(math.ceil(recognizer.pause_threshold / seconds_per_buffer))
+    phrase_buffer_count = int(math.ceil(recognizer.phrase_threshold / seconds_per_buffer))
+    non_speaking_buffer_count = int(math.ceil(recognizer.non_speaking_duration / seconds_per_buffer))
+    preroll = collections.deque(maxlen=max(1, non_speaking_buffer_count))
+
+    capacity = (int(phrase_time_limit * source.SAMPLE_RATE) + preroll.maxlen * source.CHUNK) * source.SAMPLE_WIDTH
+    spool = AudioSpool(source.SAMPLE_RATE, source.SAMPLE_WIDTH, capacity)
+
+    try:
+        elapsed_time = 0
+        while True:
+            # Wait for speech, keeping only the last few buffers
+            while True:
+                elapsed_time += seconds_per_buffer
+                if timeout and elapsed_time > timeout:
+                    raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+
+                frames = source.stream.read(source.CHUNK)
+                if not frames:
+                    spool.close()
+                    return None
+                preroll.append(frames)
+
+                energy = frame_energy(frames, source.SAMPLE_WIDTH)
+                if energy > recognizer.energy_threshold:
+                    break
+
+                if recognizer.dynamic_energy_threshold:
+                    damping = recognizer.dynamic_energy_adjustment_damping ** seconds_per_buffer
+                    target_energy = energy * recognizer.dynamic_energy_ratio
+                    recognizer.energy_threshold = recognizer.energy_threshold * damping + target_energy * (1 - damping)
+
+            spool.truncate()
+            while preroll:
+                spool.write(preroll.popleft())
+
+            # Record until the speaker pauses or the phrase limit is hit
+            phrase_start_time = elapsed_time
+            pause_count, phrase_count = 0, 0
+            pause_starts = []  # spool length before each buffer of the current pause
+            ended = False
+            while True:
+                elapsed_time += seconds_per_buffer
+                if phrase_time_limit and elapsed_time - phrase_start_time > phrase_time_limit:
+                    break
+
+                frames = source.stream.read(source.CHUNK)
+                length_before = spool.length
+                if not frames or not spool.write(frames):
+                    ended = not frames
+                    break
+                phrase_count += 1
+
+                # The threshold is held fixed during the phrase, so the speaker's
+                # own voice can't push it up and end the recording early
+                if frame_energy(frames, source.SAMPLE_WIDTH) > recognizer.energy_threshold:
+                    pause_count = 0
+                    pause_starts.clear()
+                else:
+                    pause_count += 1
+                    pause_starts.append(length_before)
+                if pause_count > pause_buffer_count:
+                    break
+
+            # Too short to be speech: drop it and keep listening
+            phrase_count -= pause_count
+            if phrase_count >= phrase_buffer_count or ended:
+                break
+
+        # Keep only non_speaking_duration of the trailing pause
+        if len(pause_starts) > non_speaking_buffer_count:
+            spool.truncate(pause_starts[non_speaking_buffer_count])
+        return spool
+    except BaseException:
+        spool.close()
+        raise
 
 def record_audio():
     """
     Records audio using speech_recognition and returns audio buffer for transcription
     """
     recognizer = sr.Recognizer()
-    
+
     # Audio recording settings
     recognizer.energy_threshold = 100
     recognizer.pause_threshold = 2.0    # 2 seconds of silence to stop
@@ -17,27 +243,28 @@ def record_audio():
         with sr.Microphone() as source:
             print("\n🎤 Speak now... (Recording will stop after 2s of silence)")
             print("Adjusting for ambient noise... Please wait...")
-            
+
             recognizer.adjust_for_ambient_noise(source, duration=2)
             print(f"Energy threshold set to {recognizer.energy_threshold}")
 
             print("\nListening...")
-            audio = recognizer.listen(
+            spool = capture_phrase(
+                recognizer,
                 source,
-                timeout=15,            # 15 seconds to start speaking
-                phrase_time_limit=600   # 600 seconds of speech allowed
+                timeout=LISTEN_TIMEOUT,
+                phrase_time_limit=PHRASE_TIME_LIMIT
             )
+            if spool is None:
+                print("⏹️ Audio stream ended before speech was detected.")
+                return None
             print("⏳ Audio captured, processing...")
-            
-            # Prepare audio data for Whisper
-            wav_data = audio.get_wav_data()
-            audio_buffer = io.BytesIO(wav_data)
-            audio_buffer.name = 'audio.wav'
-            return audio_buffer
-            
+
+            # Hand Whisper a view of the recorded WAV without copying it
+            return spool.finish(name='audio.wav')
+
     except sr.WaitTimeoutError:
         print("⏹️ No speech detected within timeout period.")
     except Exception as e:
         print(f"❌ Error: {str(e)}")
 
-    return None
\ No newline at end of file
+    return None
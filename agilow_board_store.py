@@ -0,0 +1,157 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+# Local copy of the Notion board, so a fresh process can build prompts
+# and resolve task names without a full paginated download. Kept next to
+# this module unless agilow_config sets BOARD_STORE_PATH.
+try:
+    from agilow_config import BOARD_STORE_PATH
+except ImportError:
+    BOARD_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "agilow_board.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    title TEXT NOT NULL,
+    key TEXT NOT NULL,
+    status TEXT,
+    deadline TEXT,
+    last_edited TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_key ON tasks (key);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status);
+
+CREATE TABLE IF NOT EXISTS task_assignees (
+    task_id TEXT NOT NULL REFERENCES tasks (id) ON DELETE CASCADE,
+    user_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (task_id, position)
+);
+CREATE INDEX IF NOT EXISTS task_assignees_user ON task_assignees (user_id);
+
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+class Task:
+    """Compact record of a Notion page holding only the fields the board uses"""
+    __slots__ = ("id", "title", "key", "status", "assignee_ids", "deadline", "last_edited")
+
+    def __init__(self, id, title, status=None, assignee_ids=(), deadline=None, last_edited=None):
+        self.id = id
+        self.title = title
+        self.key = normalize_title(title)
+        self.status = status
+        self.assignee_ids = assignee_ids
+        self.deadline = deadline
+        self.last_edited = last_edited
+
+    def __repr__(self):
+        return f"Task({self.title!r}, status={self.status!r})"
+
+def normalize_title(title):
+    """Lowercase and collapse whitespace so spoken names match board titles"""
+    return " ".join(title.split()).lower()
+
+def notion_timestamp(moment):
+    """Format a datetime the way Notion reports last_edited_time"""
+    return moment.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+class BoardStore:
+    """SQLite-backed board snapshot with indexes on title, status and assignee"""
+
+    def __init__(self, path=BOARD_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.executescript(SCHEMA)
+
+    def get_meta(self, name):
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, name, value):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO meta (name, value) VALUES (?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET value = excluded.value",
+                (name, value)
+            )
+
+    def _write(self, tasks):
+        for task in tasks:
+            self._conn.execute(
+                "INSERT INTO tasks (id, title, key, status, deadline, last_edited) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET title = excluded.title, key = excluded.key, "
+                "status = excluded.status, deadline = excluded.deadline, last_edited = excluded.last_edited",
+                (task.id, task.title, task.key, task.status, task.deadline, task.last_edited)
+            )
+            self._conn.execute("DELETE FROM task_assignees WHERE task_id = ?", (task.id,))
+            self._conn.executemany(
+                "INSERT INTO task_assignees (task_id, user_id, position) VALUES (?, ?, ?)",
+                [(task.id, user_id, position) for position, user_id in enumerate(task.assignee_ids)]
+            )
+
+    def upsert(self, tasks):
+        """Insert or update tasks"""
+        with self._lock, self._conn:
+            self._write(tasks)
+
+    def replace_all(self, tasks):
+        """Replace the whole snapshot (used by full syncs, drops cards archived remotely)"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM task_assignees")
+            self._conn.execute("DELETE FROM tasks")
+            self._write(tasks)
+
+    def remove(self, task_id):
+        """Drop a task, e.g. after archiving it in Notion"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def _select(self, where="", params=()):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT t.id, t.title, t.status, t.deadline, t.last_edited, "
+                "(SELECT group_concat(user_id) FROM "
+                " (SELECT user_id FROM task_assignees WHERE task_id = t.id ORDER BY position)) "
+                f"FROM tasks t {where} ORDER BY t.rowid",
+                params
+            ).fetchall()
+        return [
+            Task(task_id, title, status, tuple(assignees.split(",")) if assignees else (), deadline, last_edited)
+            for task_id, title, status, deadline, last_edited, assignees in rows
+        ]
+
+    def tasks(self, done_within_days=None):
+        """All stored tasks; optionally leave out Done cards not edited in the last N days"""
+        if done_within_days is None:
+            return self._select()
+        cutoff = notion_timestamp(datetime.now(timezone.utc) - timedelta(days=done_within_days))
+        return self._select(
+            "WHERE t.status IS NOT 'Done' OR t.last_edited >= ?",
+            (cutoff,)
+        )
+
+    def find(self, name):
+        """Find a task by (normalized) title"""
+        if not name or not isinstance(name, str):
+            return None
+        matches = self._select("WHERE t.key = ?", (normalize_title(name),))
+        return matches[0] if matches else None
+
+    def by_status(self, status):
+        return self._select("WHERE t.status = ?", (status,))
+
+    def by_assignee(self, user_id):
+        return self._select(
+            "WHERE t.id IN (SELECT task_id FROM task_assignees WHERE user_id = ?)",
+            (user_id,)
+        )
@@ -1,7 +1,9 @@
 import requests
 import json
-from datetime import datetime
+import threading
+from datetime import datetime, timedelta, timezone
 from agilow_config import NOTION_API_KEY, NOTION_DATABASE_ID
+from agilow_board_store import BoardStore, Task, notion_timestamp
 
 # Constants
 NOTION_API_VERSION = "2022-06-28"
@@ -11,16 +13,162 @@ HEADERS = {
     "Notion-Version": NOTION_API_VERSION
 }
 
-def fetch_tasks():
-    """Fetch all tasks from Notion"""
-    url = f"https://api.notion.com/v1/databases/{NOTION_DATABASE_ID}/query"
-    response = requests.post(url, headers=HEADERS)
-    
+# Only the properties the extractor and handlers actually read
+BOARD_PROPERTIES = ["Name", "Status", "Assign", "Deadline"]
+# Done cards not edited for this long are left out of the prompt's board state
+DONE_RETENTION_DAYS = 14
+QUERY_PAGE_SIZE = 100
+# Full resyncs pick up cards archived directly in Notion
+FULL_SYNC_INTERVAL = timedelta(hours=24)
+CREATED_ORDER = [{"timestamp": "created_time", "direction": "ascending"}]
+
+_property_ids = {}
+_board_store = None
+_board_store_lock = threading.Lock()
+_sync_lock = threading.Lock()
+
+def get_board_store():
+    """Open the local board store on first use"""
+    global _board_store
+    with _board_store_lock:
+        if _board_store is None:
+            _board_store = BoardStore()
+        return _board_store
+
+def parse_task(page):
+    """Convert a raw Notion page into a Task, tolerating empty or missing fields"""
+    properties = page.get("properties") or {}
+
+    title_parts = (properties.get("Name") or {}).get("title") or []
+    title = "".join(
+        part.get("plain_text") or (part.get("text") or {}).get("content", "")
+        for part in title_parts
+    )
+
+    status = ((properties.get("Status") or {}).get("status") or {}).get("name")
+
+    people = (properties.get("Assign") or {}).get("people") or []
+    assignee_ids = tuple(person["id"] for person in people if person.get("id"))
+
+    deadline = ((properties.get("Deadline") or {}).get("date") or {}).get("start")
+
+    return Task(page["id"], title, status, assignee_ids, deadline, page.get("last_edited_time"))
+
+def sync_board(full=False):
+    """Bring the local board store up to date with Notion
+
+    Normally only pages edited since the last sync are fetched.
+    A full resync runs on first use and every FULL_SYNC_INTERVAL.
+    """
+    with _sync_lock:
+        return _sync_board(get_board_store(), full)
+
+def _sync_board(board_store, full):
+    cursor = board_store.get_meta("sync_cursor")
+    last_full_sync = board_store.get_meta("full_sync_at")
+    now = datetime.now(timezone.utc)
+    if not full and last_full_sync:
+        full = now - datetime.fromisoformat(last_full_sync) > FULL_SYNC_INTERVAL
+
+    if full or not cursor:
+        tasks = fetch_tasks(sorts=CREATED_ORDER, complete=True)
+        if tasks is None:
+            return False
+        board_store.replace_all(tasks)
+        board_store.set_meta("full_sync_at", now.isoformat())
+        print(f"🔄 Synced {len(tasks)} tasks from Notion")
+    else:
+        # Notion timestamps are minute-granular, so re-read the cursor's minute
+        tasks = fetch_tasks(
+            query_filter={"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": cursor}},
+            sorts=CREATED_ORDER,
+            complete=True
+        )
+        if tasks is None:
+            return False
+        board_store.upsert(tasks)
+
+    # Local writes also touch last_edited, so the cursor only follows what was fetched
+    edits = [task.last_edited for task in tasks if task.last_edited]
+    if cursor and not full:
+        edits.append(cursor)
+    board_store.set_meta("sync_cursor", max(edits) if edits else notion_timestamp(now))
+    return True
+
+def sync_board_in_background(full=False):
+    """Start sync_board on a daemon thread unless a sync is already running"""
+    if _sync_lock.locked():
+        return None
+
+    def run():
+        try:
+            sync_board(full)
+        except Exception as e:
+            print(f"❌ Background board sync failed: {str(e)}")
+
+    thread = threading.Thread(target=run, name="board-sync", daemon=True)
+    thread.start()
+    return thread
+
+def remember_page(response):
+    """Store the page Notion returned from a create/update so the local board stays current"""
+    try:
+        get_board_store().upsert([parse_task(response.json())])
+    except (ValueError, KeyError):
+        pass
+
+def fetch_property_ids():
+    """Map database property names to IDs (cached, used for filter_properties)"""
+    if _property_ids:
+        return _property_ids
+
+    url = f"https://api.notion.com/v1/databases/{NOTION_DATABASE_ID}"
+    response = requests.get(url, headers=HEADERS)
+
     if response.status_code == 200:
-        return response.json().get("results", [])
+        for name, prop in response.json().get("properties", {}).items():
+            _property_ids[name] = prop["id"]
     else:
-        print(f"❌ Error fetching tasks: {response.text}")
-        return []
+        print(f"❌ Error fetching database schema: {response.text}")
+    return _property_ids
+
+def fetch_tasks(query_filter=None, sorts=None, properties=BOARD_PROPERTIES, complete=False):
+    """Fetch tasks from Notion as Task records
+
+    Args:
+        query_filter: Optional Notion filter object, applied server-side
+        sorts: Optional list of Notion sort objects
+        properties: Property names to return; None returns every property
+        complete: Return None instead of a partial list if a request fails
+    """
+    url = f"https://api.notion.com/v1/databases/{NOTION_DATABASE_ID}/query"
+
+    if properties:
+        # Property IDs come back from Notion already URL-encoded, so build the query string by hand
+        property_ids = fetch_property_ids()
+        projection = [f"filter_properties={property_ids[name]}" for name in properties if name in property_ids]
+        if projection:
+            url += "?" + "&".join(projection)
+
+    body = {"page_size": QUERY_PAGE_SIZE}
+    if query_filter:
+        body["filter"] = query_filter
+    if sorts:
+        body["sorts"] = sorts
+
+    tasks = []
+    while True:
+        response = requests.post(url, headers=HEADERS, json=body)
+
+        if response.status_code != 200:
+            print(f"❌ Error fetching tasks: {response.text}")
+            return None if complete else tasks
+
+        data = response.json()
+        tasks.extend(parse_task(page) for page in data.get("results", []))
+        if not data.get("has_more"):
+            return tasks
+        body["start_cursor"] = data["next_cursor"]
 
 def format_task_title(number, task_name):
     """Format task title with number prefix"""
@@ -29,13 +177,14 @@ def format_task_title(number, task_name):
 def update_task_in_notion(task_dict, existing_task):
     """Update an existing task in Notion"""
     users = fetch_users()
-    page_id = existing_task["id"]
+    page_id = existing_task.id
     url = f"https://api.notion.com/v1/pages/{page_id}"
     
     # Build properties to update
-    properties = {
-        "Status": {"status": {"name": task_dict.get('status', existing_task['properties']['Status']['status']['name'])}}
-    }
+    properties = {}
+    status = task_dict.get('status') or existing_task.status
+    if status:
+        properties["Status"] = {"status": {"name": status}}
     
     # Only include deadline if it's a valid date
     if 'deadline' in task_dict and task_dict['deadline'] not in ['No deadline', None]:
@@ -55,7 +204,8 @@ def update_task_in_notion(task_dict, existing_task):
     try:
         response = requests.patch(url, headers=HEADERS, json=data)
         if response.status_code >= 200 and response.status_code < 300:
-            print(f"✅ Updated task: {task_dict['task']} to {task_dict['status']}")
+            remember_page(response)
+            print(f"✅ Updated task: {task_dict['task']} to {status}")
             return True
         else:
             print(f"❌ Notion API error {response.status_code}: {response.text}")
@@ -84,12 +234,7 @@ def add_to_notion(task_dict):
     users = fetch_users()
     
     # Check if task exists by name only
-    existing_tasks = fetch_tasks()
-    existing_task = next(
-        (t for t in existing_tasks 
-         if t["properties"]["Name"]["title"][0]["text"]["content"].lower() == task_dict['task'].lower()),
-        None
-    )
+    existing_task = get_board_store().find(task_dict['task'])
     
     if existing_task:
         return update_task_in_notion(task_dict, existing_task)
@@ -123,6 +268,7 @@ def add_to_notion(task_dict):
     try:
         response = requests.post(url, headers=HEADERS, json=data)
         if response.status_code >= 200 and response.status_code < 300:
+            remember_page(response)
             print(f"✅ Added task: {task_dict['task']}")
             return True
         else:
@@ -135,19 +281,14 @@ def add_to_notion(task_dict):
 def delete_from_notion(task_name):
     """Delete (archive) a task from Notion"""
     # Find task by name
-    existing_tasks = fetch_tasks()
-    task_to_delete = next(
-        (t for t in existing_tasks 
-         if t["properties"]["Name"]["title"][0]["text"]["content"].lower() == task_name.lower()),
-        None
-    )
+    task_to_delete = get_board_store().find(task_name)
     
     if not task_to_delete:
         print(f"❌ Task not found: {task_name}")
         return False
         
     # Archive the page
-    page_id = task_to_delete["id"]
+    page_id = task_to_delete.id
     url = f"https://api.notion.com/v1/pages/{page_id}"  # Using pages endpoint
     
     try:
@@ -157,6 +298,7 @@ def delete_from_notion(task_name):
         response = requests.patch(url, headers=HEADERS, json=data)
         
         if response.status_code >= 200 and response.status_code < 300:
+            get_board_store().remove(page_id)
             print(f"✅ Archived task: {task_name}")
             return True
         else:
@@ -168,18 +310,13 @@ def delete_from_notion(task_name):
 
 def add_comment_to_notion(task_dict):
     """Add a comment to a task in Notion"""
-    existing_tasks = fetch_tasks()
-    task_to_update = next(
-        (t for t in existing_tasks 
-         if t["properties"]["Name"]["title"][0]["text"]["content"].lower() == task_dict['task'].lower()),
-        None
-    )
+    task_to_update = get_board_store().find(task_dict['task'])
     
     if not task_to_update:
         print(f"❌ Task not found: {task_dict['task']}")
         return False
         
-    page_id = task_to_update["id"]
+    page_id = task_to_update.id
     url = "https://api.notion.com/v1/comments"
     
     data = {
@@ -258,13 +395,7 @@ def handle_task_operations(task_dict):
         assignee = task_dict.get('assignee')
         
         # Find the task by name
-        existing_tasks = fetch_tasks()
-        task_to_update = None
-        
-        for task in existing_tasks:
-            if task["properties"]["Name"]["title"][0]["text"]["content"] == task_name:
-                task_to_update = task
-                break
+        task_to_update = get_board_store().find(task_name)
         
         if not task_to_update:
             print(f"❌ Task not found: {task_name}")
@@ -278,13 +409,7 @@ def handle_task_operations(task_dict):
         task_name = task_dict.get('task')
         
         # Find the task by name
-        existing_tasks = fetch_tasks()
-        task_to_delete = None
-        
-        for task in existing_tasks:
-            if task["properties"]["Name"]["title"][0]["text"]["content"] == task_name:
-                task_to_delete = task
-                break
+        task_to_delete = get_board_store().find(task_name)
         
         if not task_to_delete:
             print(f"❌ Task not found: {task_name}")
@@ -299,13 +424,7 @@ def handle_task_operations(task_dict):
         comment_text = task_dict.get('comment')
         
         # Find the task by name
-        existing_tasks = fetch_tasks()
-        task_to_comment = None
-        
-        for task in existing_tasks:
-            if task["properties"]["Name"]["title"][0]["text"]["content"] == task_name:
-                task_to_comment = task
-                break
+        task_to_comment = get_board_store().find(task_name)
         
         if not task_to_comment:
             print(f"❌ Task not found: {task_name}")
@@ -320,20 +439,14 @@ def handle_task_operations(task_dict):
         new_name = task_dict.get('new_name')
         
         # Find the task with the old name
-        existing_tasks = fetch_tasks()
-        task_to_rename = None
-        
-        for task in existing_tasks:
-            if task["properties"]["Name"]["title"][0]["text"]["content"] == old_name:
-                task_to_rename = task
-                break
+        task_to_rename = get_board_store().find(old_name)
         
         if not task_to_rename:
             print(f"❌ Task not found: {old_name}")
             return False
         
         # Update the task name
-        return update_task_name(task_to_rename["id"], new_name)
+        return update_task_name(task_to_rename.id, new_name)
     
     elif operation == 'reposition':
         # Currently not fully supported by Notion API
@@ -366,6 +479,7 @@ def update_task_name(task_id, new_name):
         response = requests.patch(url, headers=HEADERS, json=data)
         
         if response.status_code >= 200 and response.status_code < 300:
+            remember_page(response)
             print(f"✅ Renamed task successfully to: {new_name}")
             return True
         else:
@@ -1,45 +1,132 @@
 import openai
 from agilow_config import OPENAI_API_KEY
 from datetime import datetime
-from agilow_notion_handler import fetch_tasks, fetch_users
+from agilow_notion_handler import fetch_users, sync_board, sync_board_in_background, get_board_store, DONE_RETENTION_DAYS
+from agilow_board_store import normalize_title
 import json
 import re
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future
 
 client = openai.OpenAI(api_key=OPENAI_API_KEY)
 
-def format_board_state(tasks):
-    """Format current board state for GPT"""
-    # First, get all users
-    users = fetch_users()
-    
-    board_state = "Current Board State:\n\n"
-    
-    # Add available assignees section
-    board_state += "Available Team Members:\n"
+# Model routing: small requests go to the fast tier and only escalate to the
+# larger model when the fast tier's output fails validation.
+# The fast tier gets no client retries so a stalled call escalates within its budget.
+MODEL_TIERS = {
+    "fast": {"model": "gpt-4o-mini", "latency_budget": 8.0, "max_retries": 0},
+    "standard": {"model": "gpt-4o", "latency_budget": 60.0, "max_retries": 2},
+}
+TIER_ORDER = ["fast", "standard"]
+FAST_TIER_MAX_WORDS = 40
+FAST_TIER_MAX_TASKS = 60
+COMPLEX_OPERATION_HINTS = re.compile(
+    r"\b(?:rename|move|reposition|top|bottom|plan|every|all|each|break down|split)\b"
+)
+
+# Which tier served each request, most recent last
+routing_log = deque(maxlen=100)
+
+def choose_model_tier(transcription, task_count):
+    """Pick a model tier from transcript length, board size and expected operations"""
+    text = transcription.lower()
+    if len(text.split()) > FAST_TIER_MAX_WORDS:
+        return "standard"
+    if task_count > FAST_TIER_MAX_TASKS:
+        return "standard"
+    if COMPLEX_OPERATION_HINTS.search(text):
+        return "standard"
+    return "fast"
+
+def tier_client(tier):
+    """OpenAI client with the tier's latency budget as timeout and its retry policy"""
+    return client.with_options(
+        timeout=MODEL_TIERS[tier]["latency_budget"],
+        max_retries=MODEL_TIERS[tier]["max_retries"]
+    )
+
+def next_model_tier(tier):
+    """Return the next larger tier, or None if already at the largest"""
+    index = TIER_ORDER.index(tier)
+    return TIER_ORDER[index + 1] if index + 1 < len(TIER_ORDER) else None
+
+def record_routing(purpose, tier, latency, ok, usage=None):
+    """Remember which tier served a request and how much of the prompt prefix was cached"""
+    model = MODEL_TIERS[tier]["model"]
+    prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached_tokens = getattr(details, "cached_tokens", 0) or 0
+    routing_log.append({
+        "purpose": purpose,
+        "tier": tier,
+        "model": model,
+        "latency": round(latency, 2),
+        "ok": ok,
+        "prompt_version": PROMPT_VERSION,
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+    })
+    over_budget = " (over budget)" if latency > MODEL_TIERS[tier]["latency_budget"] else ""
+    print(f"🧭 {purpose} served by {tier} tier ({model}) in {latency:.1f}s{over_budget}")
+    if prompt_tokens:
+        print(f"♻️ Prompt cache: {cached_tokens}/{prompt_tokens} tokens reused")
+
+def check_extraction(response, tasks, utterance_count=None):
+    """Check a model's extraction output; returns a reason string if it should be escalated"""
+    if not response:
+        return "no response"
+    if not tasks:
+        cleaned = response.replace("```json", "").replace("```", "").strip()
+        if cleaned != "[]":
+            return "no valid operations"
+    # Names created or renamed earlier in the same response
+    known_names = set()
+    for task in tasks:
+        if utterance_count and utterance_index(task, utterance_count) is None:
+            return f"operation without a valid utterance number: {task}"
+        operation = task.get('operation') or 'create'
+        if operation == 'create':
+            if not isinstance(task.get('task'), str):
+                return f"invalid task name '{task.get('task')}'"
+            known_names.add(normalize_title(task['task']))
+            continue
+        name = task.get('old_name') if operation == 'rename' else task.get('task')
+        if not isinstance(name, str):
+            return f"unknown task '{name}'"
+        if normalize_title(name) not in known_names and not get_board_store().find(name):
+            return f"unknown task '{name}'"
+        if operation == 'rename':
+            if not isinstance(task.get('new_name'), str):
+                return f"invalid new name '{task.get('new_name')}'"
+            known_names.add(normalize_title(task['new_name']))
+    return None
+
+def format_team(users):
+    """Format the available assignees for GPT"""
+    team = "Available Team Members:\n"
     for user_name in users.keys():
-        board_state += f"- {user_name}\n"
+        team += f"- {user_name}\n"
+    return team
+
+def format_board_state(tasks, users=None):
+    """Format current board state for GPT"""
+    if users is None:
+        users = fetch_users()
+    user_names = {user_id: user_name for user_name, user_id in users.items()}
     
+    board_state = "Current Board State:\n"
     board_state += "\nCurrent Tasks:\n"
     statuses = {"Not started": [], "In Progress": [], "Done": []}
     
     # Group tasks by status
     for task in tasks:
-        status = task["properties"]["Status"]["status"]["name"]
-        name = task["properties"]["Name"]["title"][0]["text"]["content"]
-        
-        # Get assignee
-        assignee = None
-        if "Assign" in task["properties"] and task["properties"]["Assign"]["people"]:
-            assignee = task["properties"]["Assign"]["people"][0]["name"]
-        
-        # Get deadline - FIXED to handle None values properly
-        deadline = "No deadline"
-        if "Deadline" in task["properties"] and task["properties"]["Deadline"] is not None:
-            date_obj = task["properties"]["Deadline"].get("date")
-            if date_obj:
-                deadline = date_obj.get("start", "No deadline")
-            
-        statuses[status].append((name, assignee, deadline))
+        assignee = user_names.get(task.assignee_ids[0]) if task.assignee_ids else None
+        deadline = task.deadline or "No deadline"
+        # Cards without a status get their own heading so updates don't invent one
+        statuses.setdefault(task.status or "No status", []).append((task.title, assignee, deadline))
     
     # Format tasks by status
     for status, tasks in statuses.items():
@@ -50,102 +137,350 @@ def format_board_state(tasks):
     
     return board_state
 
+# Static instructions go first so the provider can cache this prefix across
+# calls; bump PROMPT_VERSION whenever the text changes. Prompt caching only
+# applies to prefixes of at least 1024 tokens, which is why the worked
+# examples live here rather than being trimmed.
+PROMPT_VERSION = "extract-v3"
+EXTRACTION_INSTRUCTIONS = f"""[{PROMPT_VERSION}]
+You are a project management AI that extracts task operations from spoken input.
+Based on the current board state, your role is to:
+1. Create new tasks
+2. Update existing tasks
+3. Delete tasks when requested
+4. Rename existing tasks
+5. Add comments to tasks
+6. Reposition tasks (move them to top/bottom or before/after other tasks)
+
+Available Status Options:
+- "Not started"
+- "In Progress"
+- "Done"
+
+CRITICAL: Return ONLY a JSON array. Do not include any explanations, text, or comments before or after the JSON array.
+
+IMPORTANT: When the user asks to "add a comment" or "comment on" a task, use the comment operation format below, NOT the update operation.
+
+For adding comments, use this format:
+{{
+    "operation": "comment",
+    "task": "Exact Task Name",
+    "comment": "Comment text here"
+}}
+
+When updating existing tasks (status/deadline/assignee changes), use this format:
+{{
+    "operation": "update",
+    "task": "Exact Task Name",
+    "status": "New Status",
+    "deadline": "YYYY-MM-DD",  // maintain existing if not changing
+    "assignee": "Person Name"   // maintain existing if not changing
+}}
+
+For renaming tasks, use this format:
+{{
+    "operation": "rename",
+    "old_name": "Current Task Name",
+    "new_name": "New Task Name"
+}}
+
+For repositioning tasks, use this format:
+{{
+    "operation": "reposition",
+    "task": "Exact Task Name",
+    "position": "top"  // can be "top", "bottom", "before", or "after"
+    "reference_task": "Other Task Name"  // only needed for "before" or "after"
+}}
+
+For deadlines:
+- Use ISO format dates (YYYY-MM-DD)
+- For "tonight" or "today", use today's date as given with the board state
+- If no specific deadline, omit the deadline field entirely
+
+IMPORTANT:
+1. Return ONLY one JSON array containing ALL operations
+2. Use EXACT status values from Available Status Options
+3. Use EXACT names from team members list
+4. For bulk updates, create separate operations for each task
+5. Always maintain existing values when updating tasks
+6. Return ONLY a JSON array for each task. Do not add any explanation or text.
+
+WORKED EXAMPLES (task and people names below are illustrative only; always use the
+names from the board state and team members list you are given):
+
+Spoken: "Add a task to write the onboarding guide for Priya, due next Friday"
+Board: no task called "Write onboarding guide"; today is a Monday
+[
+    {{"operation": "create", "task": "Write onboarding guide", "status": "Not started", "deadline": "<date of next Friday>", "assignee": "Priya"}}
+]
+
+Spoken: "The login bug is done"
+Board: "Fix login bug" is In Progress, assigned to Sam, due 2025-03-10
+[
+    {{"operation": "update", "task": "Fix login bug", "status": "Done", "deadline": "2025-03-10", "assignee": "Sam"}}
+]
+
+Spoken: "Start on the API docs and the release notes"
+Board: "API docs" and "Release notes" are both Not started
+[
+    {{"operation": "update", "task": "API docs", "status": "In Progress"}},
+    {{"operation": "update", "task": "Release notes", "status": "In Progress"}}
+]
+
+Spoken: "Get rid of the old marketing task"
+Board: "Old marketing plan" exists
+[
+    {{"operation": "delete", "task": "Old marketing plan"}}
+]
+
+Spoken: "Note on the database migration that staging is already migrated"
+Board: "Database migration" exists
+[
+    {{"operation": "comment", "task": "Database migration", "comment": "Staging is already migrated"}}
+]
+
+Spoken: "Call the design review task UI review instead"
+Board: "Design review" exists
+[
+    {{"operation": "rename", "old_name": "Design review", "new_name": "UI review"}}
+]
+
+Spoken: "Put the security audit at the top"
+Board: "Security audit" exists
+[
+    {{"operation": "reposition", "task": "Security audit", "position": "top"}}
+]
+
+Spoken: "Move the demo prep after the client call"
+Board: "Demo prep" and "Client call" exist
+[
+    {{"operation": "reposition", "task": "Demo prep", "position": "after", "reference_task": "Client call"}}
+]
+
+Spoken: "Give the invoices task to Alex and push it to the end of the month"
+Board: "Send invoices" is Not started, unassigned, no deadline
+[
+    {{"operation": "update", "task": "Send invoices", "status": "Not started", "deadline": "<last day of this month>", "assignee": "Alex"}}
+]
+
+Spoken: "Everything Jordan had in progress is finished"
+Board: "Update pricing page" and "Write blog post" are In Progress for Jordan; "Plan offsite" is In Progress for Sam
+[
+    {{"operation": "update", "task": "Update pricing page", "status": "Done", "assignee": "Jordan"}},
+    {{"operation": "update", "task": "Write blog post", "status": "Done", "assignee": "Jordan"}}
+]
+
+Spoken: "New task, book the venue, it needs to happen tonight, and add a comment to the budget task saying the venue is approved"
+Board: no task called "Book the venue"; "Budget" exists; today is 2025-03-03
+[
+    {{"operation": "create", "task": "Book the venue", "status": "Not started", "deadline": "2025-03-03"}},
+    {{"operation": "comment", "task": "Budget", "comment": "The venue is approved"}}
+]
+
+Spoken: "Nothing new today, thanks"
+[]
+
+Notes on the examples:
+- Spoken task names rarely match the board exactly; pick the existing task the speaker
+  clearly means and use its exact board name.
+- Only create a task when no existing task matches.
+- Replace placeholders such as <date of next Friday> with a real YYYY-MM-DD date.
+- When nothing actionable was said, return an empty array.
+"""
+
+BATCH_INSTRUCTIONS = """BATCHED INPUT: When several numbered spoken inputs are given, they come from different
+speakers and are independent commands against the same board. Add an "utterance" field
+to every operation holding the number of the input it came from, and still return ONE
+JSON array with the operations for all inputs.
+"""
+
+# Micro-batching of queued transcripts
+BATCH_MAX_SIZE = 8
+BATCH_MAX_WAIT = 1.5  # seconds to wait for more transcripts after the first arrives
+
+def build_extraction_messages(team, board_state, transcription, current_date):
+    """Order the prompt from most to least stable: instructions, team, date, board, transcript"""
+    return [
+        {"role": "system", "content": f"{EXTRACTION_INSTRUCTIONS}\n{team}"},
+        {
+            "role": "user",
+            "content": f"Today's date is {current_date}.\n\n{board_state}\nSPOKEN INPUT TO PROCESS:\n\"{transcription}\""
+        }
+    ]
+
+def build_batch_messages(team, board_state, transcriptions, current_date):
+    """Same layout as build_extraction_messages, with numbered transcripts at the end"""
+    spoken_inputs = "\n".join(
+        f"{number}. \"{transcription}\"" for number, transcription in enumerate(transcriptions, 1)
+    )
+    return [
+        {"role": "system", "content": f"{EXTRACTION_INSTRUCTIONS}\n{team}"},
+        {
+            "role": "user",
+            "content": f"Today's date is {current_date}.\n\n{board_state}\n{BATCH_INSTRUCTIONS}\nSPOKEN INPUTS TO PROCESS:\n{spoken_inputs}"
+        }
+    ]
+
+def load_board():
+    """Current tasks, team list and board text, read from the local board store"""
+    board_store = get_board_store()
+    if board_store.get_meta("sync_cursor"):
+        # Serve the stored snapshot now; changes made elsewhere are picked up in the background
+        sync_board_in_background()
+    elif not sync_board():
+        print("⚠️ Could not sync with Notion, using the locally stored board")
+    current_tasks = board_store.tasks(done_within_days=DONE_RETENTION_DAYS)
+    users = fetch_users()
+    return current_tasks, format_team(users), format_board_state(current_tasks, users)
+
+def run_extraction(messages, transcription, current_tasks, utterance_count=None):
+    """Send the prompt to the routed model tier, escalating when validation fails"""
+    tier = choose_model_tier(transcription, len(current_tasks))
+    while tier:
+        response = get_gpt_response(messages, tier)
+        tasks = parse_json_response(response)
+        problem = check_extraction(response, tasks, utterance_count)
+        if not problem:
+            return tasks
+
+        tier = next_model_tier(tier)
+        if tier:
+            print(f"⤴️ Escalating to {tier} tier: {problem}")
+
+    return tasks
+
 def extract_tasks(transcription):
     """Extract tasks and operations from transcription"""
-    current_tasks = fetch_tasks()
-    board_state = format_board_state(current_tasks)
+    current_tasks, team, board_state = load_board()
     current_date = datetime.now().strftime("%Y-%m-%d")
-    
-    prompt = f"""
-    {board_state}
-    Today's date is {current_date}.
+    messages = build_extraction_messages(team, board_state, transcription, current_date)
+    return run_extraction(messages, transcription, current_tasks)
 
-    Available Status Options:
-    - "Not started"
-    - "In Progress"
-    - "Done"
-    
-    SPOKEN INPUT TO PROCESS:
-    "{transcription}"
-
-    You are a project management AI. Based on the current board state above, your role is to:
-    1. Create new tasks
-    2. Update existing tasks
-    3. Delete tasks when requested
-    4. Rename existing tasks
-    5. Add comments to tasks
-    6. Reposition tasks (move them to top/bottom or before/after other tasks)
-
-    CRITICAL: Return ONLY a JSON array. Do not include any explanations, text, or comments before or after the JSON array.
-
-    IMPORTANT: When the user asks to "add a comment" or "comment on" a task, use the comment operation format below, NOT the update operation.
-
-    For adding comments, use this format:
-    {{
-        "operation": "comment",
-        "task": "Exact Task Name",
-        "comment": "Comment text here"
-    }}
-
-    When updating existing tasks (status/deadline/assignee changes), use this format:
-    {{
-        "operation": "update",
-        "task": "Exact Task Name",
-        "status": "New Status",
-        "deadline": "YYYY-MM-DD",  // maintain existing if not changing
-        "assignee": "Person Name"   // maintain existing if not changing
-    }}
-
-    For renaming tasks, use this format:
-    {{
-        "operation": "rename",
-        "old_name": "Current Task Name",
-        "new_name": "New Task Name"
-    }}
-
-    For repositioning tasks, use this format:
-    {{
-        "operation": "reposition",
-        "task": "Exact Task Name",
-        "position": "top"  // can be "top", "bottom", "before", or "after"
-        "reference_task": "Other Task Name"  // only needed for "before" or "after"
-    }}
-
-    For deadlines:
-    - Use ISO format dates (YYYY-MM-DD)
-    - For "tonight" or "today", use "{current_date}"
-    - If no specific deadline, omit the deadline field entirely
-
-    IMPORTANT:
-    1. Return ONLY one JSON array containing ALL operations
-    2. Use EXACT status values from Available Status Options
-    3. Use EXACT names from team members list
-    4. For bulk updates, create separate operations for each task
-    5. Always maintain existing values when updating tasks
-    6. Return ONLY a JSON array for each task. Do not add any explanation or text.
+def utterance_index(task, utterance_count):
+    """Zero-based index of the utterance an operation is tagged with, or None"""
+    try:
+        number = int(task.get('utterance'))
+    except (TypeError, ValueError):
+        return None
+    return number - 1 if 1 <= number <= utterance_count else None
+
+def extract_tasks_batch(transcriptions):
+    """Extract operations for several transcripts in one request against one board snapshot
+
+    Returns one list of operations per transcript, in the same order.
     """
+    if len(transcriptions) == 1:
+        return [extract_tasks(transcriptions[0])]
+
+    current_tasks, team, board_state = load_board()
+    current_date = datetime.now().strftime("%Y-%m-%d")
+    messages = build_batch_messages(team, board_state, transcriptions, current_date)
+    tasks = run_extraction(messages, " ".join(transcriptions), current_tasks, len(transcriptions))
+
+    results = [[] for _ in transcriptions]
+    for task in tasks:
+        index = utterance_index(task, len(transcriptions))
+        task.pop('utterance', None)
+        if index is None:
+            print(f"⚠️ Skipping operation without a valid utterance number: {task}")
+            continue
+        results[index].append(task)
+    return results
+
+class ExtractionQueue:
+    """Collects transcripts arriving close together and extracts them in one call
+
+    submit() returns a Future that resolves to that transcript's operations.
+    A batch is sent once max_batch_size transcripts are queued or max_wait
+    seconds have passed since the first one arrived. Used by the daemon mode
+    of Voice to Kanban Main.py.
+    """
+
+    def __init__(self, max_batch_size=BATCH_MAX_SIZE, max_wait=BATCH_MAX_WAIT):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending = queue.Queue()
+        self._closed = False
+        self._close_lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="extraction-queue", daemon=True)
+        self._worker.start()
+
+    def submit(self, transcription):
+        future = Future()
+        with self._close_lock:
+            if self._closed:
+                raise RuntimeError("ExtractionQueue is closed")
+            self._pending.put((transcription, future))
+        return future
+
+    def close(self):
+        """Flush queued transcripts and stop the worker"""
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._pending.put(None)
+        self._worker.join()
 
-    response = get_gpt_response(prompt)
-    return parse_json_response(response)
+    def _collect(self):
+        """Block for the first transcript, then gather more until the batch is full or max_wait passes"""
+        first = self._pending.get()
+        if first is None:
+            return None, True
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
 
-def get_gpt_response(prompt):
+    def _run(self):
+        stop = False
+        while not stop:
+            batch, stop = self._collect()
+            if not batch:
+                continue
+            futures = [future for _, future in batch]
+            print(f"📦 Extracting {len(batch)} queued transcript(s) in one request")
+            try:
+                results = extract_tasks_batch([transcription for transcription, _ in batch])
+            except Exception as e:
+                print(f"❌ Batch extraction failed: {str(e)}")
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            for future, tasks in zip(futures, results):
+                future.set_result(tasks)
+
+        # Nothing should be left after the sentinel, but never leave a caller waiting forever
+        while True:
+            try:
+                item = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[1].set_exception(RuntimeError("ExtractionQueue is closed"))
+
+def get_gpt_response(messages, tier="standard"):
+    started = time.monotonic()
     try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a task extraction AI. Extract new tasks and updates from spoken input."
-                },
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ]
+        response = tier_client(tier).chat.completions.create(
+            model=MODEL_TIERS[tier]["model"],
+            messages=messages
         )
         
+        record_routing("Extraction", tier, time.monotonic() - started, True, response.usage)
         return response.choices[0].message.content.strip()
     except Exception as e:
+        record_routing("Extraction", tier, time.monotonic() - started, False)
         print(f"❌ OpenAI API error: {str(e)}")
         return None
 
@@ -179,14 +514,14 @@ def parse_json_response(response):
         print(f"⚠️ Regex extraction failed: {str(e)}")
     
     # Final attempt: Use GPT to reformat the response
-    print("🔄 Using GPT-4 to reformat non-JSON response...")
+    print("🔄 Using GPT to reformat non-JSON response...")
     reformatted_json = reformat_with_gpt(response)
     
     if reformatted_json:
         try:
             tasks = json.loads(reformatted_json)
             if isinstance(tasks, list):
-                print("✅ Successfully reformatted response using GPT-4")
+                print("✅ Successfully reformatted response using GPT")
                 return validate_tasks(tasks)
         except json.JSONDecodeError:
             print("❌ Failed to parse reformatted response")
@@ -194,83 +529,89 @@ def parse_json_response(response):
     print("❌ All parsing methods failed. Could not extract tasks.")
     return []
 
-def reformat_with_gpt(text):
-    """Use GPT-4 to convert non-JSON text into proper JSON format"""
+REFORMAT_INSTRUCTIONS = """You are a JSON formatting assistant.
+
+Convert the text you are given into a valid JSON array of task operations. Each task should have an "operation" field
+(create, update, delete, comment, rename, reposition) and appropriate fields for that operation.
+
+Use these formats for different operations:
+
+For creating tasks:
+{
+    "operation": "create",
+    "task": "Task Name",
+    "status": "Not started",
+    "deadline": "YYYY-MM-DD",
+    "assignee": "Person Name"
+}
+
+For updating tasks:
+{
+    "operation": "update",
+    "task": "Exact Task Name",
+    "status": "New Status",
+    "deadline": "YYYY-MM-DD",
+    "assignee": "Person Name"
+}
+
+For deleting tasks:
+{
+    "operation": "delete",
+    "task": "Exact Task Name"
+}
+
+For commenting on tasks:
+{
+    "operation": "comment",
+    "task": "Exact Task Name",
+    "comment": "Comment text"
+}
+
+For renaming tasks:
+{
+    "operation": "rename",
+    "old_name": "Current Task Name",
+    "new_name": "New Task Name"
+}
+
+For repositioning tasks:
+{
+    "operation": "reposition",
+    "task": "Exact Task Name",
+    "position": "top",
+    "reference_task": "Other Task Name"
+}
+
+Return ONLY the JSON array with no explanation or additional text.
+"""
+
+def reformat_with_gpt(text, tier="fast"):
+    """Use GPT to convert non-JSON text into proper JSON format"""
     prompt = f"""
     The following text should contain task information but is not in proper JSON format:
     
     {text}
-    
-    Convert this into a valid JSON array of task operations. Each task should have an "operation" field 
-    (create, update, delete, comment, rename, reposition) and appropriate fields for that operation.
-    
-    Use these formats for different operations:
-    
-    For creating tasks:
-    {{
-        "operation": "create",
-        "task": "Task Name",
-        "status": "Not started",
-        "deadline": "YYYY-MM-DD",
-        "assignee": "Person Name"
-    }}
-    
-    For updating tasks:
-    {{
-        "operation": "update",
-        "task": "Exact Task Name",
-        "status": "New Status",
-        "deadline": "YYYY-MM-DD",
-        "assignee": "Person Name"
-    }}
-    
-    For deleting tasks:
-    {{
-        "operation": "delete",
-        "task": "Exact Task Name"
-    }}
-    
-    For commenting on tasks:
-    {{
-        "operation": "comment",
-        "task": "Exact Task Name",
-        "comment": "Comment text"
-    }}
-    
-    For renaming tasks:
-    {{
-        "operation": "rename",
-        "old_name": "Current Task Name",
-        "new_name": "New Task Name"
-    }}
-    
-    For repositioning tasks:
-    {{
-        "operation": "reposition",
-        "task": "Exact Task Name",
-        "position": "top",
-        "reference_task": "Other Task Name"
-    }}
-    
-    Return ONLY the JSON array with no explanation or additional text.
     """
     
+    started = time.monotonic()
     try:
-        response = client.chat.completions.create(
-            model="gpt-4",  # Using GPT-4 as requested
+        response = tier_client(tier).chat.completions.create(
+            model=MODEL_TIERS[tier]["model"],  # Reformatting doesn't need the large model
             messages=[
-                {"role": "system", "content": "You are a JSON formatting assistant."},
+                {"role": "system", "content": REFORMAT_INSTRUCTIONS},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.1,
         )
         
+        record_routing("Reformat", tier, time.monotonic() - started, True, response.usage)
         result = response.choices[0].message.content.strip()
         # Clean up the result
         result = result.replace("```json", "").replace("```", "").strip()
         return result
     except Exception as e:
-        print(f"❌ Error reformatting with GPT-4: {str(e)}")
+        record_routing("Reformat", tier, time.monotonic() - started, False)
+        print(f"❌ Error reformatting with GPT: {str(e)}")
         return None
 
 def validate_tasks(tasks):